@@ -1,6 +1,9 @@
 import cv2
-import datetime
 import os
+import queue
+import signal
+import sys
+import threading
 import time
 from ultralytics import YOLO
 import numpy as np
@@ -12,108 +15,235 @@ CAMERA_INDEX = 0
 OUTPUT_DIR = "car_photos"
 FRAME_WIDTH = 1280
 FRAME_HEIGHT = 720
+CAMERA_FPS = 30
 CAR_CLASSES = [2, 3, 5, 7]        # car, truck, bus, motorcycle
 CONF_THRESH = 0.5                  # YOLO confidence threshold
-MIN_CONTOUR_AREA = 500             # min area for motion detection
-SAVE_COOLDOWN = 10                 # seconds between photo saves
-
+MOTION_SCALE = 4                   # motion mask is computed at 1/MOTION_SCALE resolution
+MIN_CONTOUR_AREA = 500 // MOTION_SCALE**2  # min area for motion detection (downscaled px)
+SAVE_COOLDOWN = 10.0               # seconds between photo saves (monotonic clock)
+DETECT_STRIDE = 3                  # run YOLO on every Nth frame only
+MOTION_MIN = 2000 // MOTION_SCALE**2  # min foreground pixels (downscaled) before running YOLO
+JPEG_QUALITY = 85                  # saved photo quality (OpenCV default is 95)
+SHOW_PREVIEW = os.environ.get("PREVIEW", "0") == "1"  # PREVIEW=1 opens the live window
+PREVIEW_EVERY = 3                  # refresh the preview on every Nth frame only
+
+# Export with: yolo export model=yolov8s.pt format=openvino half=True int8=False dynamic=True
 OPENVINO_MODEL_DIR = "yolov8s_openvino_model"  # your existing OpenVINO folder
+INT8_MODEL_DIR = "yolov8s_int8_openvino_model"  # created by quantizeModel.py, used if present
+INFERENCE_DEVICE = "intel:gpu"     # OpenVINO device: "intel:cpu", "intel:gpu", "intel:npu"
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Let OpenCV use every core for resize/morphology
+cv2.setUseOptimized(True)
+cv2.setNumThreads(os.cpu_count() or 1)
+
 # -----------------------------
 # LOAD YOLO MODEL
 # -----------------------------
 print("Loading YOLO model...")
-model = YOLO(OPENVINO_MODEL_DIR, task="detect")
-print("✅ YOLO model loaded!")
+model_dir = INT8_MODEL_DIR if os.path.isdir(INT8_MODEL_DIR) else OPENVINO_MODEL_DIR
+model = YOLO(model_dir, task="detect")
+print(f"✅ YOLO model loaded from {model_dir}!")
 
 # -----------------------------
 # INITIALIZE CAMERA & BACKGROUND SUBTRACTOR
 # -----------------------------
-cap = cv2.VideoCapture(CAMERA_INDEX, cv2.CAP_DSHOW)
+if sys.platform == "win32":
+    backend = cv2.CAP_MSMF
+elif sys.platform.startswith("linux"):
+    backend = cv2.CAP_V4L2
+else:
+    backend = cv2.CAP_ANY
+cap = cv2.VideoCapture(CAMERA_INDEX, backend)
+# MJPEG needs far less USB bandwidth than raw YUY2, so 720p can hold full FPS
+cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
 cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
 cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+cap.set(cv2.CAP_PROP_FPS, CAMERA_FPS)
+cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # don't queue stale frames in the driver
 
 fgbg = cv2.createBackgroundSubtractorMOG2(history=500, varThreshold=50, detectShadows=True)
+# 3x3 on the 1/4-scale mask already covers ~12x12 px of the full frame
+kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+
+# Motion buffers are allocated once and reused via dst= every frame
+small_w, small_h = FRAME_WIDTH // MOTION_SCALE, FRAME_HEIGHT // MOTION_SCALE
+small = np.empty((small_h, small_w, 3), dtype=np.uint8)
+gray = np.empty((small_h, small_w), dtype=np.uint8)
+fgmask = np.empty((small_h, small_w), dtype=np.uint8)
+labels = np.empty((small_h, small_w), dtype=np.int32)
 
-last_save_time = 0
-print("Starting motion+YOLO detection. Press 'q' to quit.")
+# -----------------------------
+# CAPTURE & WRITER THREADS
+# -----------------------------
+frame_q = queue.Queue(maxsize=1)   # latest frame only, stale frames are dropped
+save_q = queue.Queue(maxsize=16)   # (path, frame) pairs waiting to be written
+stop_event = threading.Event()
+
+
+def capture_loop():
+    while not stop_event.is_set():
+        ret, f = cap.read()
+        if not ret:
+            f = None  # tell the main loop the camera is gone
+        try:
+            frame_q.put_nowait(f)
+        except queue.Full:
+            try:
+                frame_q.get_nowait()
+            except queue.Empty:
+                pass
+            frame_q.put_nowait(f)
+        if f is None:
+            break
+
+
+def writer_loop():
+    while True:
+        item = save_q.get()
+        if item is None:
+            break
+        path, img = item
+        ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY,
+                                             cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+        if not ok:
+            print(f"❌ Failed to encode {path}")
+            continue
+        try:
+            with open(path, "wb") as f:
+                f.write(buf.tobytes())
+        except OSError as e:
+            print(f"❌ Failed to write {path}: {e}")
+
+
+capture_thread = threading.Thread(target=capture_loop, daemon=True)
+writer_thread = threading.Thread(target=writer_loop, daemon=True)
+capture_thread.start()
+writer_thread.start()
+
+# Ctrl+C stops the loop cleanly (the only way out when there's no preview window)
+signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+last_save_time = -SAVE_COOLDOWN    # monotonic; allows a save on the very first detection
+frame_idx = 0
+last_boxes = []                    # (x1, y1, x2, y2, label) from the latest YOLO pass
+needs_resize = None                # decided once, on the first frame
+last_ts_sec = 0                    # second the cached timestamp strings belong to
+ts = ts_fname = ""
+if SHOW_PREVIEW:
+    print("Starting motion+YOLO detection. Press 'q' to quit.")
+else:
+    print("Starting motion+YOLO detection (no preview). Press Ctrl+C to quit.")
 
 # -----------------------------
 # MAIN LOOP
 # -----------------------------
-while True:
-    ret, frame = cap.read()
-    if not ret:
+while not stop_event.is_set():
+    try:
+        frame = frame_q.get(timeout=1)
+    except queue.Empty:
+        continue
+    if frame is None:
         print("❌ Failed to grab frame")
         break
+    frame_idx += 1
+    now_mono = time.monotonic()  # immune to NTP/wall-clock jumps
+
+    # Only resize if the driver ignored the requested resolution
+    if needs_resize is None:
+        needs_resize = frame.shape[:2] != (FRAME_HEIGHT, FRAME_WIDTH)
+        if needs_resize:
+            print(f"⚠️ Camera delivers {frame.shape[1]}x{frame.shape[0]}, "
+                  f"resizing to {FRAME_WIDTH}x{FRAME_HEIGHT}")
+    if needs_resize:
+        frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
 
     # --- Motion detection ---
-    fgmask = fgbg.apply(frame)
-    fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, None)
-    fgmask = cv2.morphologyEx(fgmask, cv2.MORPH_CLOSE, None)
-    contours, _ = cv2.findContours(fgmask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    moving_boxes = []
-    for cnt in contours:
-        if cv2.contourArea(cnt) > MIN_CONTOUR_AREA:
-            x, y, w, h = cv2.boundingRect(cnt)
-            moving_boxes.append((x, y, w, h))
-
-    # --- YOLO detection on moving regions ---
+    # MOG2 + morphology run on a small grayscale copy; full-res frame is kept for YOLO/saving
+    cv2.resize(frame, (small_w, small_h), dst=small, interpolation=cv2.INTER_AREA)
+    cv2.cvtColor(small, cv2.COLOR_BGR2GRAY, dst=gray)
+    fgbg.apply(gray, fgmask)
+    cv2.morphologyEx(fgmask, cv2.MORPH_OPEN, kernel, dst=fgmask, iterations=1)
+    cv2.morphologyEx(fgmask, cv2.MORPH_CLOSE, kernel, dst=fgmask, iterations=1)
+    motion_pixels = cv2.countNonZero(fgmask)
+    # One C pass over the mask gives area + bbox for every blob; filter with NumPy
+    _, _, stats, _ = cv2.connectedComponentsWithStats(fgmask, labels, connectivity=8)
+    stats = stats[1:]  # drop the background label
+    keep = stats[stats[:, cv2.CC_STAT_AREA] > MIN_CONTOUR_AREA]
+    moving_boxes = (keep[:, [cv2.CC_STAT_LEFT, cv2.CC_STAT_TOP,
+                             cv2.CC_STAT_WIDTH, cv2.CC_STAT_HEIGHT]] * MOTION_SCALE).tolist()
+
+    # --- YOLO detection, only every DETECT_STRIDE frames and when something is moving ---
     car_found = False
-    for (x, y, w, h) in moving_boxes:
-        # crop the moving region
-        crop = frame[y:y+h, x:x+w]
-        if crop.size == 0:
-            continue  # skip empty crops
-
-        # resize crop for YOLO (match exported OpenVINO model input, e.g., 640x640)
-        detect_size = 640
-        crop_resized = cv2.resize(crop, (detect_size, detect_size))
-
-        # YOLO detection
-        results = model.predict(source=crop_resized, verbose=False)
-
-        for box in results[0].boxes:
-            cls_id = int(box.cls[0])
-            conf = float(box.conf[0])
-            if cls_id in CAR_CLASSES and conf >= CONF_THRESH:
-                car_found = True
-                # Map box back to original frame
+    if frame_idx % DETECT_STRIDE == 0:
+        last_boxes = []
+        if moving_boxes and motion_pixels > MOTION_MIN:
+            # One full-frame pass at native aspect ratio instead of one pass per ROI
+            results = model.predict(source=frame, imgsz=640, verbose=False,
+                                    classes=CAR_CLASSES, conf=CONF_THRESH,
+                                    device=INFERENCE_DEVICE, half=True)
+
+            for box in results[0].boxes:
                 x1, y1, x2, y2 = map(int, box.xyxy[0])
-                x_scale = w / detect_size
-                y_scale = h / detect_size
-                x1 = int(x1 * x_scale + x)
-                x2 = int(x2 * x_scale + x)
-                y1 = int(y1 * y_scale + y)
-                y2 = int(y2 * y_scale + y)
+                # Keep only detections that overlap a moving region (ignore parked cars)
+                if not any(x1 < x + w and x < x2 and y1 < y + h and y < y2
+                           for (x, y, w, h) in moving_boxes):
+                    continue
+
+                cls_id = int(box.cls[0])
+                conf = float(box.conf[0])
+                car_found = True
                 label = f"{model.names[cls_id]} {conf*100:.1f}%"
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, label, (x1, y1 - 5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+                last_boxes.append((x1, y1, x2, y2, label))
+
+    # --- Draw latest detections (reused on skipped frames) ---
+    for (x1, y1, x2, y2, label) in last_boxes:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        cv2.putText(frame, label, (x1, y1 - 5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
 
     # --- Timestamp overlay ---
-    ts = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    # strftime only when the second rolls over
+    sec = int(time.time())
+    if sec != last_ts_sec:
+        ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+        ts_fname = ts.replace(":", "-")
+        last_ts_sec = sec
     cv2.putText(frame, ts, (10, FRAME_HEIGHT - 10),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
 
     # --- Save photo if car detected and cooldown passed ---
-    if car_found and (time.time() - last_save_time > SAVE_COOLDOWN):
-        filename = os.path.join(OUTPUT_DIR, f"{ts.replace(':','-')}.jpg")
-        cv2.imwrite(filename, frame)
-        print(f"💾 Moving car detected ({ts}) — saved to {filename}")
-        last_save_time = time.time()
+    if car_found and (now_mono - last_save_time > SAVE_COOLDOWN):
+        filename = os.path.join(OUTPUT_DIR, f"{ts_fname}.jpg")
+        try:
+            save_q.put_nowait((filename, frame.copy()))
+            print(f"💾 Moving car detected ({ts}) — saved to {filename}")
+        except queue.Full:
+            print(f"⚠️ Writer busy, dropped photo for {ts}")
+        last_save_time = now_mono
 
     # --- Show live preview ---
-    cv2.imshow("Motion+YOLO Car Detector", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
+    if SHOW_PREVIEW and frame_idx % PREVIEW_EVERY == 0:
+        cv2.imshow("Motion+YOLO Car Detector", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
 
 # -----------------------------
 # CLEANUP
 # -----------------------------
-cap.release()
-cv2.destroyAllWindows()
+stop_event.set()
+capture_thread.join(timeout=1)
+try:
+    save_q.put(None, timeout=5)  # flush pending photos before exiting
+except queue.Full:
+    print("⚠️ Writer not draining, pending photos may be lost")
+writer_thread.join(timeout=10)
+if capture_thread.is_alive():
+    # Still stuck inside cap.read(); releasing now would free it under the read
+    print("⚠️ Camera read is stalled, skipping cap.release()")
+else:
+    cap.release()
+if SHOW_PREVIEW:
+    cv2.destroyAllWindows()
 print("Camera stopped. Photos saved in:", OUTPUT_DIR)
@@ -1,69 +1,200 @@
 #!/usr/bin/env python3
 
 import argparse
-import pathlib
-import re
-import datetime
 import collections
+import os
+import re
+import time
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 # Match filenames like:
 #   2025-10-22 16-33-39.jpg
 #   2025-10-22_16-33-39.png
 DATE_RE = re.compile(r'^(\d{4}-\d{2}-\d{2})[ _](\d{2}-\d{2}-\d{2})')
 
+MTIME_SETTLE_NS = 2_000_000_000  # see aggregate_cached
+CACHE_COLUMNS = ["dir", "mtime", "sub", "date", "files"]
+
 IMG_EXTS = {
     ".jpg", ".jpeg", ".png", ".heic", ".bmp", ".gif",
     ".webp", ".tiff"
 }
 
 
-def parse_date_from_filename(name: str):
-    m = DATE_RE.match(name)
-    if not m:
-        return None
+def _has_date_prefix(n: str):
+    # Fixed-width "YYYY-MM-DD?HH-MM-SS" separators, checked before the regex
+    return (len(n) >= 19 and n[4] == "-" and n[7] == "-" and n[10] in " _"
+            and n[13] == "-" and n[16] == "-")
 
-    date_part = m.group(1)
-    time_part = m.group(2).replace("-", ":")
 
-    try:
-        dt = datetime.datetime.strptime(
-            f"{date_part} {time_part}",
-            "%Y-%m-%d %H:%M:%S"
-        )
-        return dt.date()
-    except ValueError:
-        return None
+def _scan_dir(dirp):
+    """Return (subdirectories, matching image paths) of a single directory."""
+    subdirs, files = [], []
 
+    # os.scandir reuses the type info from readdir, so no extra stat() per entry
+    with os.scandir(dirp) as it:
+        for e in it:
+            if e.is_dir(follow_symlinks=False):
+                subdirs.append(e.path)
+            elif e.is_file():
+                name = e.name
+                # Cheap prefix check before touching the regex
+                if not _has_date_prefix(name):
+                    continue
 
-def find_files(root: pathlib.Path, recursive: bool):
-    it = root.rglob("*") if recursive else root.iterdir()
+                # Accept image formats or no extension if pattern matches
+                _, dot, ext = name.rpartition(".")
+                if dot and "." + ext.lower() not in IMG_EXTS:
+                    continue
 
-    files = []
-    for f in it:
-        if not f.is_file():
-            continue
+                if DATE_RE.match(name):
+                    files.append(e.path)
 
-        ext = f.suffix.lower()
+    return subdirs, files
 
-        # Accept image formats or no extension if pattern matches
-        if ext in IMG_EXTS or ext == "":
-            if DATE_RE.match(f.name):
-                files.append(f)
 
+def find_files(root: str, recursive: bool):
+    files = []
+
+    def walk(dirp, top=False):
+        try:
+            subdirs, found = _scan_dir(dirp)
+        except PermissionError:
+            # Like rglob, skip subdirectories we can't read
+            if top:
+                raise
+            return
+
+        files.extend(found)
+        if recursive:
+            for d in subdirs:
+                walk(d)
+
+    walk(root, top=True)
     return files
 
 
+def parse_dates(files):
+    # Parse every filename in one vectorized pass instead of strptime per file
+    names = pd.Series([os.path.basename(f) for f in files], dtype=object)
+    parts = names.str.extract(DATE_RE.pattern)
+
+    dt = pd.to_datetime(
+        parts[0] + " " + parts[1].str.replace("-", ":", regex=False),
+        format="%Y-%m-%d %H:%M:%S",
+        errors="coerce"
+    )
+
+    # Midnight of each day; invalid dates stay NaT
+    return dt.dt.normalize()
+
+
 def aggregate_counts(files):
-    cnt = collections.Counter()
+    days = parse_dates(files).value_counts()
+    return {ts.date(): int(n) for ts, n in days.items()}
+
 
-    for f in files:
-        d = parse_date_from_filename(f.name)
-        if d:
-            cnt[d] += 1
+def load_cache(cache_path):
+    """Read the cache as {dir: (mtime_ns, subdirs, {date: count})}."""
+    if not os.path.exists(cache_path):
+        return {}
+
+    try:
+        df = pd.read_parquet(cache_path)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"Ignoring unreadable cache {cache_path}: {e}")
+        return {}
+
+    # Older (path, date) caches or unrelated Parquet files
+    missing = set(CACHE_COLUMNS) - set(df.columns)
+    if missing:
+        print(f"Ignoring unreadable cache {cache_path}: "
+              f"missing columns {sorted(missing)}")
+        return {}
+
+    cache = {}
+    for row in df.itertuples(index=False):
+        _, subdirs, days = cache.setdefault(row.dir, (row.mtime, [], {}))
+        if not pd.isna(row.sub):
+            subdirs.append(row.sub)
+        elif not pd.isna(row.date):
+            days[row.date.date()] = row.files
+
+    return cache
+
+
+def save_cache(cache, cache_path):
+    # One row per (dir, date) and per (dir, subdir); a bare row marks an empty dir
+    rows = []
+    for d, (mtime, subdirs, days) in cache.items():
+        rows += [(d, mtime, None, pd.Timestamp(day), n) for day, n in days.items()]
+        rows += [(d, mtime, sub, pd.NaT, 0) for sub in subdirs]
+        if not days and not subdirs:
+            rows.append((d, mtime, None, pd.NaT, 0))
+
+    df = pd.DataFrame(rows, columns=CACHE_COLUMNS)
+    df["sub"] = df["sub"].astype(object)
+    df["date"] = pd.to_datetime(df["date"])
 
-    return cnt
+    try:
+        df.to_parquet(cache_path, index=False)
+    except (ImportError, OSError) as e:
+        print(f"Could not write cache {cache_path}: {e}")
+
+
+def aggregate_cached(root: str, recursive: bool, cache_path: str):
+    """Like find_files + aggregate_counts, but skip directories that haven't changed.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed, and dates come from filenames, so an unchanged mtime means the
+    cached per-day counts and subdirectory list are still valid.
+    """
+    root = os.path.abspath(root)
+    cache = load_cache(cache_path)
+    seen = {}
+    dirty = False
+    counts = collections.Counter()
+    # Coarse-mtime filesystems (FAT: 2 s) can hide changes made right after a
+    # scan, so directories modified that recently are always rescanned
+    settle_ns = time.time_ns() - MTIME_SETTLE_NS
+
+    def walk(dirp, top=False):
+        nonlocal dirty
+        try:
+            mtime = os.stat(dirp).st_mtime_ns
+            entry = cache.get(dirp)
+            if entry is None or entry[0] != mtime or mtime > settle_ns:
+                subdirs, found = _scan_dir(dirp)
+                entry = (mtime, subdirs, aggregate_counts(found))
+                dirty = True
+        except (PermissionError, FileNotFoundError):
+            # Like rglob, skip subdirectories we can't read (or that just vanished)
+            if top:
+                raise
+            return
+
+        seen[dirp] = entry
+        counts.update(entry[2])
+        if recursive:
+            for d in entry[1]:
+                walk(d)
+
+    walk(root, top=True)
+
+    if recursive:
+        # Forget directories under root that no longer exist
+        prefix = os.path.join(root, "")
+        stale = [d for d in cache if d not in seen and d.startswith(prefix)]
+        for d in stale:
+            del cache[d]
+        dirty = dirty or bool(stale)
+
+    if dirty:
+        cache.update(seen)
+        save_cache(cache, cache_path)
+
+    return dict(counts)
 
 
 def plot_counts(counts, out_path=None):
@@ -71,11 +202,14 @@ def plot_counts(counts, out_path=None):
         print("No matching files found.")
         return
 
-    s = pd.Series(counts).sort_index()
-    s.index = pd.to_datetime(s.index)
+    # Imported lazily so printing counts doesn't wait on matplotlib
+    import matplotlib.pyplot as plt
+
+    dates = sorted(counts)
+    vals = np.array([counts[d] for d in dates])
 
     plt.figure(figsize=(10, 4))
-    plt.bar(s.index.strftime("%Y-%m-%d"), s.values)
+    plt.bar([d.isoformat() for d in dates], vals)
     plt.xticks(rotation=45, ha='right')
     plt.xlabel("Date")
     plt.ylabel("Cars per day")
@@ -97,17 +231,33 @@ def main():
     parser.add_argument("-r", "--recursive", action="store_true",
                         help="Scan subdirectories too")
     parser.add_argument("-o", "--out", help="Save plot as PNG")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="Reuse per-directory counts from this Parquet "
+                             "file across runs")
 
     args = parser.parse_args()
 
-    root = pathlib.Path(args.folder)
-    files = find_files(root, args.recursive)
-
-    if not files:
-        print("No files matched the naming pattern.")
+    if not os.path.isdir(args.folder):
+        print(f"Folder not found: {args.folder}")
         return
 
-    counts = aggregate_counts(files)
+    try:
+        if args.cache:
+            counts = aggregate_cached(args.folder, args.recursive, args.cache)
+            if not counts:
+                print("No files matched the naming pattern.")
+                return
+        else:
+            files = find_files(args.folder, args.recursive)
+
+            if not files:
+                print("No files matched the naming pattern.")
+                return
+
+            counts = aggregate_counts(files)
+    except PermissionError as e:
+        print(f"Cannot read folder: {e}")
+        return
 
     print("\nCounts:")
     for d, c in sorted(counts.items()):
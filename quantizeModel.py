@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+import argparse
+import pathlib
+import shutil
+import cv2
+import numpy as np
+import nncf
+import openvino as ov
+
+# Same model folders cameraPC.py uses
+FP_MODEL_DIR = "yolov8s_openvino_model"
+INT8_MODEL_DIR = "yolov8s_int8_openvino_model"
+# Raw camera frames; car_photos has boxes, labels and the timestamp drawn in
+CALIB_DIR = "calib_frames"
+# Detect head of YOLOv8 (last module); its box decoding must stay in float
+HEAD_MODULE = "model.22"
+
+IMG_SIZE = 640
+IMG_EXTS = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def find_calibration_images(root: pathlib.Path, limit: int):
+    files = []
+    for f in sorted(root.iterdir()):
+        if len(files) >= limit:
+            break
+        if not f.is_file() or f.suffix.lower() not in IMG_EXTS:
+            continue
+        # Cheap 1/8-scale decode to weed out unreadable files before calibration
+        if cv2.imread(str(f), cv2.IMREAD_REDUCED_GRAYSCALE_8) is None:
+            print(f"Skipping unreadable image: {f}")
+            continue
+        files.append(f)
+    return files
+
+
+def head_ignored_scope(head: str):
+    # Same exclusions as ultralytics' own INT8 export: quantizing the DFL and
+    # the Add/Sub/Mul/Div box decoding after the head wrecks box coordinates
+    return nncf.IgnoredScope(
+        patterns=[
+            f".*{head}/.*/Add",
+            f".*{head}/.*/Sub*",
+            f".*{head}/.*/Mul*",
+            f".*{head}/.*/Div*",
+            f".*{head}\\.dfl.*",
+        ],
+        types=["Sigmoid"],
+    )
+
+
+def preprocess(path):
+    # Letterbox to IMG_SIZE x IMG_SIZE exactly like ultralytics does at inference
+    img = cv2.imread(str(path))
+    h, w = img.shape[:2]
+    scale = IMG_SIZE / max(h, w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    img = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((IMG_SIZE, IMG_SIZE, 3), 114, dtype=np.uint8)
+    top = (IMG_SIZE - nh) // 2
+    left = (IMG_SIZE - nw) // 2
+    canvas[top:top + nh, left:left + nw] = img
+
+    blob = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB).transpose(2, 0, 1)
+    return np.expand_dims(blob, 0).astype(np.float32) / 255.0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="INT8-quantize the OpenVINO YOLO model using raw camera frames."
+    )
+    parser.add_argument("--src", default=FP_MODEL_DIR,
+                        help="FP32/FP16 OpenVINO model folder")
+    parser.add_argument("--dst", default=INT8_MODEL_DIR,
+                        help="Output folder for the INT8 model")
+    parser.add_argument("--calib", default=CALIB_DIR,
+                        help="Folder of raw (unannotated) calibration frames")
+    parser.add_argument("--head", default=HEAD_MODULE,
+                        help="Name of the detect head module to keep in float")
+    parser.add_argument("-n", "--num", type=int, default=200,
+                        help="Max number of calibration frames")
+
+    args = parser.parse_args()
+
+    src = pathlib.Path(args.src)
+    dst = pathlib.Path(args.dst)
+
+    xml_files = list(src.glob("*.xml"))
+    if not xml_files:
+        print(f"No OpenVINO .xml model found in {src}")
+        return
+
+    calib_dir = pathlib.Path(args.calib)
+    images = find_calibration_images(calib_dir, args.num) if calib_dir.is_dir() else []
+    if not images:
+        print(f"No calibration images found in {calib_dir} "
+              "(fill it with raw, unannotated camera frames)")
+        return
+
+    print(f"Quantizing {xml_files[0]} with {len(images)} calibration frames...")
+    model_fp = ov.Core().read_model(xml_files[0])
+    calib = nncf.Dataset(images, preprocess)
+    qmodel = nncf.quantize(model_fp, calib, preset=nncf.QuantizationPreset.MIXED,
+                           ignored_scope=head_ignored_scope(args.head))
+
+    dst.mkdir(parents=True, exist_ok=True)
+    ov.save_model(qmodel, dst / xml_files[0].name)
+
+    # ultralytics reads class names/imgsz from metadata.yaml next to the IR
+    metadata = src / "metadata.yaml"
+    if metadata.exists():
+        shutil.copy(metadata, dst / metadata.name)
+
+    print(f"Saved INT8 model to: {dst}")
+
+
+if __name__ == "__main__":
+    main()